@@ -6,77 +6,332 @@ Handles app launching, CEC control, and browser management
 
 import json
 import os
+import re
 import sys
 import subprocess
 import signal
 import logging
+import logging.handlers
+import atexit
 import time
 import shutil
-import socket
+import functools
+import gzip
+import queue
+import select
+import mimetypes
 from pathlib import Path
+from collections import namedtuple
+from email.utils import formatdate
 from http.server import HTTPServer, SimpleHTTPRequestHandler
-from threading import Thread
-from urllib.parse import urlparse, parse_qs
+from threading import Thread, Lock, Event
+from urllib.parse import urlparse
 
 # Setup
 SCRIPT_DIR = Path(__file__).parent.absolute()
 CONFIG_FILE = SCRIPT_DIR / 'config.json'
 DEFAULT_CONFIG = SCRIPT_DIR / 'config.default.json'
 LOG_FILE = '/tmp/pi-media-hub.log'
+HTTP_WORKERS = 4
+STATIC_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.png', '.woff2')
+# Served pre-compressed; the other static types are already compressed
+GZIP_EXTENSIONS = ('.html', '.css', '.js', '.svg')
+
+# Top-level sections a saved config must have
+_REQUIRED_CONFIG_KEYS = frozenset({'apps', 'display', 'startup', 'exit', 'remote', 'advanced'})
+
+# /launch/exit or /launch/app/<key>, ignoring any query string
+_LAUNCH_RE = re.compile(r'^/launch/(?:(?P<exit>exit)|app/(?P<key>[^/?#]+))(?=[?#]|$)')
+
+# Extra chromium flags for apps whose URL contains the key
+APP_EXTRA_FLAGS = {
+    'youtube': ['--user-agent=Mozilla/5.0 (SMART-TV; Linux; Tizen 5.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.31 TV Safari/537.36'],
+}
+
+# Native players to look for, and the arguments to start them with
+NATIVE_APPS = {
+    'jellyfin': (['jellyfinmediaplayer', 'jellyfin-media-player'], ['--fullscreen', '--platform', 'eglfs']),
+    'spotify': (['spotify'], []),
+}
+
+# How to launch one app, resolved when config is loaded
+LaunchPlan = namedtuple('LaunchPlan', ['enabled', 'method', 'url', 'native_cmd', 'browser_cmd', 'exec_replace'])
+
+# Log calls only enqueue; a listener thread does the file/console writes
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=1_000_000, backupCount=3, delay=True),
+    logging.StreamHandler(),
+    respect_handler_level=True
+)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=32)
+def _which(cmd):
+    """shutil.which, cached since installed binaries don't move while we run"""
+    return shutil.which(cmd)
+
+
+# Parsed JSON files: path -> ((st_mtime_ns, st_size), data)
+_CONFIG_CACHE = {}
+
+
+def _load_json(path):
+    """Parse a JSON file, reusing the last result while the file is unchanged"""
+    st = path.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _CONFIG_CACHE.get(str(path))
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    with open(path) as f:
+        data = json.load(f)
+    _CONFIG_CACHE[str(path)] = (stamp, data)
+    return data
+
+
+def _remember_json(path, data):
+    """Record data as the parsed contents of a file we just wrote"""
+    st = path.stat()
+    _CONFIG_CACHE[str(path)] = ((st.st_mtime_ns, st.st_size), data)
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles requests on a bounded pool of daemon threads"""
+
+    # MediaHubLauncher that LaunchHandler dispatches to
+    launcher = None
+
+    def __init__(self, server_address, handler_class, workers=HTTP_WORKERS):
+        super().__init__(server_address, handler_class)
+        self.requests = queue.SimpleQueue()
+        # Daemon threads, so a worker stuck on a client can't hold up exit
+        self.workers = [
+            Thread(target=self.worker, name=f'kiosk-http-{i}', daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        self.requests.put((request, client_address))
+
+    def worker(self):
+        while True:
+            request, client_address = self.requests.get()
+            if request is None:
+                return
+            self.process_request_thread(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        # Same as ThreadingMixIn, but run on a pool worker
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        for _ in self.workers:
+            self.requests.put((None, None))
+
+
+class LaunchHandler(SimpleHTTPRequestHandler):
+    """Serves the interface and routes API/launch requests to server.launcher"""
+
+    # Set TCP_NODELAY so small responses aren't held back by Nagle
+    disable_nagle_algorithm = True
+    # Drop idle connections (e.g. Chromium preconnects) so they can't pin a worker
+    timeout = 5
+
+    def log_message(self, format, *args):
+        # Access log goes to our logger at DEBUG to keep it out of the file
+        logger.debug(f"HTTP: {format % args}")
+
+    def log_error(self, format, *args):
+        # Log errors
+        logger.error(f"HTTP Error: {format % args}")
+
+    def do_GET(self):
+        try:
+            # Handle API: Get config
+            if self.path == '/api/config':
+                self.server.launcher._handle_get_config(self)
+            # Handle launch protocol
+            elif self.path.startswith('/launch'):
+                self.server.launcher.handle_launch_request(self.path)
+                self.send_response(200)
+                self.send_header('Content-type', 'text/html')
+                self.end_headers()
+                self.wfile.write(b'<html><body>Launching...</body></html>')
+            else:
+                cached = self.server.launcher._static.get(urlparse(self.path).path)
+                if cached:
+                    self.server.launcher.send_static(self, cached)
+                else:
+                    SimpleHTTPRequestHandler.do_GET(self)
+        except Exception as e:
+            logger.error(f"Error in do_GET: {e}", exc_info=True)
+            try:
+                self.send_response(500)
+                self.end_headers()
+            except:
+                pass
+
+    def do_POST(self):
+        try:
+            # Handle API: Save config
+            if self.path == '/api/config':
+                self.server.launcher._handle_post_config(self)
+            else:
+                self.send_response(404)
+                self.end_headers()
+        except Exception as e:
+            logger.error(f"Error in do_POST: {e}", exc_info=True)
+            try:
+                self.send_response(500)
+                self.end_headers()
+            except:
+                pass
+
+
 class MediaHubLauncher:
     def __init__(self):
+        # Binary locations don't change while we run, so resolve them once
+        self._chromium_path = self._resolve_chromium()
         self.config = self.load_config()
+        self._cec_path = _which('cec-client')
+        self._cec_available = bool(self._cec_path)
+        # Environment for child processes; Popen doesn't mutate it, so it's shared
+        self._child_env = {**os.environ, 'DISPLAY': os.environ.get('DISPLAY', ':0')}
         self.browser_process = None
         self.app_process = None
         self.http_server = None
         self.http_thread = None
+        self._ready = Event()
+        self._static = {}
         self.port = 8000
+        # Guards browser_process/app_process, which HTTP handler threads mutate
+        self.process_lock = Lock()
+        # Held for a whole launch so concurrent requests can't start two apps
+        self._launch_lock = Lock()
+        # Serializes config saves now that requests are handled concurrently
+        self.config_lock = Lock()
+        # Long-lived cec-client, started on the first CEC command
+        self._cec_proc = None
+        self._cec_lock = Lock()
+        # Work for the main thread; SimpleQueue.put is safe from signal handlers
+        self._events = queue.SimpleQueue()
+        self._wakeup_write = None
+        self._running = False
 
     def load_config(self):
         """Load configuration, fallback to default if needed"""
         try:
-            if CONFIG_FILE.exists():
-                with open(CONFIG_FILE) as f:
-                    config = json.load(f)
-                    logger.info("Loaded user config")
-                    return config
-            else:
-                with open(DEFAULT_CONFIG) as f:
-                    config = json.load(f)
-                    logger.info("Loaded default config")
-                    return config
+            config = self._read_config()
+            self._apply_config(config, self._derive_config(config))
+            logger.info(f"Loaded {'user' if CONFIG_FILE.exists() else 'default'} config")
+            return config
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
             sys.exit(1)
 
-    def check_dependencies(self):
-        """Check if required commands are available"""
-        deps = {
-            'chromium-browser': ['chromium-browser', 'chromium'],
-            'cec-client': ['cec-client'] if self.config['remote']['enable_cec'] else []
+    def _read_config(self):
+        """Parse the user config, or the defaults if there is none"""
+        if CONFIG_FILE.exists():
+            return _load_json(CONFIG_FILE)
+        return _load_json(DEFAULT_CONFIG)
+
+    def refresh_config(self):
+        """Pick up edits made to config.json outside the API (setup.py, by hand)"""
+        try:
+            # Just a stat() unless the file changed since it was last parsed
+            config = self._read_config()
+            if config is self.config:
+                return
+            derived = self._derive_config(config)
+        except Exception as e:
+            logger.error(f"Ignoring unreadable config, keeping current one: {e}")
+            return
+
+        with self.config_lock:
+            self._apply_config(config, derived)
+        logger.info("Config changed on disk, reloaded")
+
+    def _derive_config(self, config):
+        """Precompute the config values used on the launch path; raises if config is malformed"""
+        chromium_flags = tuple(config['advanced']['chromium_flags'])
+        return {
+            '_config_bytes': json.dumps(config, separators=(',', ':')).encode(),
+            '_chromium_flags': chromium_flags,
+            '_cec_enabled': config['remote']['enable_cec'],
+            '_exit_action': config['exit']['action'],
+            '_exit_fallback': config['exit'].get('cec_fallback', 'close'),
+            '_plans': self._compile_plans(config['apps'], chromium_flags),
         }
 
+    def _apply_config(self, config, derived):
+        """Make config and its _derive_config() values current"""
+        self.config = config
+        for name, value in derived.items():
+            setattr(self, name, value)
+
+    def _compile_plans(self, apps, chromium_flags):
+        """Build a LaunchPlan per app so launching is just a lookup"""
+        plans = {}
+        for app_key, app in apps.items():
+            method = app.get('launch_method', 'browser')
+            url = app.get('url')
+
+            # Native player, if this app wants one and it's installed
+            native_cmd = None
+            if method == 'native' or (method == 'auto' and app.get('prefer_native', False)):
+                candidates, args = NATIVE_APPS.get(app_key, ([], []))
+                for cmd in candidates:
+                    cmd_path = _which(cmd)
+                    if cmd_path:
+                        # Absolute path so Popen can use posix_spawn
+                        native_cmd = [cmd_path, *args]
+                        break
+
+            # Full chromium command line
+            browser_cmd = None
+            if self._chromium_path and url:
+                extra_flags = []
+                for key, flags in APP_EXTRA_FLAGS.items():
+                    if key in url:
+                        extra_flags.extend(flags)
+                browser_cmd = [self._chromium_path, *chromium_flags, *extra_flags, url]
+
+            plans[app_key] = LaunchPlan(
+                enabled=app.get('enabled', False),
+                method=method,
+                url=url,
+                native_cmd=native_cmd,
+                browser_cmd=browser_cmd,
+                exec_replace=app.get('exec_replace', False)
+            )
+        return plans
+
+    def check_dependencies(self):
+        """Check if required commands are available"""
         missing = []
-        for name, commands in deps.items():
-            found = False
-            for cmd in commands:
-                if shutil.which(cmd):
-                    found = True
-                    break
-            if not found and commands:
-                missing.append(name)
+        if not self._chromium_path:
+            missing.append('chromium-browser')
+        if self._cec_enabled and not self._cec_available:
+            missing.append('cec-client')
 
         if missing:
             logger.warning(f"Missing dependencies: {', '.join(missing)}")
@@ -87,61 +342,16 @@ class MediaHubLauncher:
 
     def start_http_server(self):
         """Start local HTTP server for the interface"""
-        os.chdir(SCRIPT_DIR)
-
-        # Store reference to parent launcher for use in handler
-        launcher = self
-
-        class CustomHandler(SimpleHTTPRequestHandler):
-            def log_message(self, format, *args):
-                # Log to our logger instead of suppressing
-                logger.info(f"HTTP: {format % args}")
-
-            def log_error(self, format, *args):
-                # Log errors
-                logger.error(f"HTTP Error: {format % args}")
-
-            def do_GET(self):
-                try:
-                    # Handle API: Get config
-                    if self.path == '/api/config':
-                        launcher.send_config(self)
-                    # Handle launch protocol
-                    elif self.path.startswith('/launch'):
-                        launcher.handle_launch_request(self.path)
-                        self.send_response(200)
-                        self.send_header('Content-type', 'text/html')
-                        self.end_headers()
-                        self.wfile.write(b'<html><body>Launching...</body></html>')
-                    else:
-                        SimpleHTTPRequestHandler.do_GET(self)
-                except Exception as e:
-                    logger.error(f"Error in do_GET: {e}", exc_info=True)
-                    try:
-                        self.send_response(500)
-                        self.end_headers()
-                    except:
-                        pass
-
-            def do_POST(self):
-                try:
-                    # Handle API: Save config
-                    if self.path == '/api/config':
-                        launcher.save_config_api(self)
-                    else:
-                        self.send_response(404)
-                        self.end_headers()
-                except Exception as e:
-                    logger.error(f"Error in do_POST: {e}", exc_info=True)
-                    try:
-                        self.send_response(500)
-                        self.end_headers()
-                    except:
-                        pass
+        self._static = self.load_static_files()
 
         try:
             # Bind to 127.0.0.1 explicitly instead of 'localhost' to avoid IPv6 issues
-            self.http_server = HTTPServer(('127.0.0.1', self.port), CustomHandler)
+            # Serve files from SCRIPT_DIR without changing the process cwd
+            handler = functools.partial(LaunchHandler, directory=str(SCRIPT_DIR))
+            self.http_server = PooledHTTPServer(('127.0.0.1', self.port), handler)
+            self.http_server.launcher = self
+            # The socket is bound and listening once the server object exists
+            self._ready.set()
             logger.info(f"HTTP server created, binding to 127.0.0.1:{self.port}")
 
             def server_thread_wrapper():
@@ -158,65 +368,95 @@ class MediaHubLauncher:
             logger.error(f"Failed to start HTTP server: {e}", exc_info=True)
             sys.exit(1)
 
+    def load_static_files(self):
+        """Read the interface files into memory so page loads skip the SD card"""
+        static = {}
+        for path in SCRIPT_DIR.iterdir():
+            if path.suffix in STATIC_EXTENSIONS and path.is_file():
+                mime = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+                last_modified = formatdate(path.stat().st_mtime, usegmt=True)
+                body = path.read_bytes()
+                gzip_body = gzip.compress(body) if path.suffix in GZIP_EXTENSIONS else None
+                static['/' + path.name] = (body, gzip_body, mime, last_modified)
+        if '/index.html' in static:
+            static['/'] = static['/index.html']
+        logger.info(f"Cached {len(static)} static files")
+        return static
+
+    def send_static(self, handler, cached):
+        """Send a cached static file, or 304 if the client's copy is current"""
+        body, gzip_body, mime, last_modified = cached
+        if handler.headers.get('If-Modified-Since') == last_modified:
+            handler.send_response(304)
+            handler.end_headers()
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-type', mime)
+        if gzip_body is not None:
+            handler.send_header('Vary', 'Accept-Encoding')
+            if 'gzip' in handler.headers.get('Accept-Encoding', ''):
+                handler.send_header('Content-Encoding', 'gzip')
+                body = gzip_body
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('Last-Modified', last_modified)
+        # Always revalidate so edits show up after a restart; that's a cheap 304
+        handler.send_header('Cache-Control', 'no-cache')
+        handler.end_headers()
+        handler.wfile.write(body)
+
     def wait_for_server_ready(self, timeout=10):
         """Wait for HTTP server to be ready to accept connections"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            try:
-                # Try to connect to the server
-                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                sock.settimeout(1)
-                result = sock.connect_ex(('127.0.0.1', self.port))
-                sock.close()
-
-                if result == 0:
-                    logger.info(f"HTTP server is ready and accepting connections on 127.0.0.1:{self.port}")
-                    return True
-
-                logger.info(f"Server not ready yet, waiting... ({int(time.time() - start_time)}s/{timeout}s)")
-                time.sleep(0.5)
-            except Exception as e:
-                logger.warning(f"Error checking server readiness: {e}")
-                time.sleep(0.5)
+        if self._ready.wait(timeout):
+            logger.info(f"HTTP server is ready and accepting connections on 127.0.0.1:{self.port}")
+            return True
 
         logger.error(f"Server failed to become ready within {timeout} seconds")
-        # Check if thread is still alive
-        if self.http_thread and self.http_thread.is_alive():
-            logger.error("HTTP thread is running but not accepting connections")
-        else:
-            logger.error("HTTP thread has died")
         return False
 
-    def send_config(self, handler):
-        """Send config to client"""
+    def _handle_get_config(self, handler):
+        """Handle GET /api/config - Send config to client"""
         try:
-            # Reload config to get latest
-            self.config = self.load_config()
+            self.refresh_config()
 
+            # Serialized when config is loaded or saved, so this is just a write
+            config_bytes = self._config_bytes
             handler.send_response(200)
             handler.send_header('Content-type', 'application/json')
+            handler.send_header('Content-Length', str(len(config_bytes)))
             handler.send_header('Access-Control-Allow-Origin', '*')
             handler.end_headers()
-            handler.wfile.write(json.dumps(self.config).encode())
+            handler.wfile.write(config_bytes)
             logger.info("Config sent to client")
         except Exception as e:
             logger.error(f"Failed to send config: {e}")
             handler.send_response(500)
             handler.end_headers()
 
-    def save_config_api(self, handler):
-        """Save config from client"""
+    def _handle_post_config(self, handler):
+        """Handle POST /api/config - Save config from client"""
         try:
             content_length = int(handler.headers['Content-Length'])
             post_data = handler.rfile.read(content_length)
-            new_config = json.loads(post_data.decode())
+            new_config = json.loads(post_data)
+
+            # Validate config structure
+            if not _REQUIRED_CONFIG_KEYS.issubset(new_config):
+                handler.send_response(400)
+                handler.send_header('Content-type', 'application/json')
+                handler.end_headers()
+                handler.wfile.write(json.dumps({'success': False, 'error': 'Invalid config structure'}).encode())
+                return
 
-            # Save to file
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(new_config, f, indent=2)
+            # Fails on a malformed config before anything is written
+            derived = self._derive_config(new_config)
 
-            # Reload config
-            self.config = new_config
+            with self.config_lock:
+                # Save to file
+                self.write_config(new_config)
+
+                # Reload config
+                self._apply_config(new_config, derived)
 
             handler.send_response(200)
             handler.send_header('Content-type', 'application/json')
@@ -231,75 +471,47 @@ class MediaHubLauncher:
             handler.end_headers()
             handler.wfile.write(json.dumps({'success': False, 'error': str(e)}).encode())
 
+    def write_config(self, new_config):
+        """Write config.json atomically so a power cut can't leave it half-written"""
+        data = json.dumps(new_config, indent=2).encode()
+        tmp = CONFIG_FILE.with_suffix('.json.tmp')
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fdatasync(f.fileno())
+            os.replace(tmp, CONFIG_FILE)
+        except Exception:
+            tmp.unlink(missing_ok=True)
+            _CONFIG_CACHE.pop(str(CONFIG_FILE), None)
+            raise
+        # So the next refresh_config() sees this exact dict and skips a reparse
+        _remember_json(CONFIG_FILE, new_config)
+
     def handle_launch_request(self, path):
         """Handle launch:// protocol requests from browser"""
         logger.info(f"Launch request: {path}")
 
-        if '/launch/exit' in path:
+        match = _LAUNCH_RE.match(path)
+        if not match:
+            logger.warning(f"Unknown launch request: {path}")
+        elif match['exit']:
             self.handle_exit()
-        elif '/launch/app/' in path:
-            app_key = path.split('/launch/app/')[-1].split('?')[0]
-            self.launch_app(app_key)
-
-    def handle_get_config(self, handler):
-        """Handle GET /api/config - Return current configuration"""
-        try:
-            handler.send_response(200)
-            handler.send_header('Content-Type', 'application/json')
-            handler.send_header('Access-Control-Allow-Origin', '*')
-            handler.end_headers()
-
-            config_json = json.dumps(self.config, indent=2)
-            handler.wfile.write(config_json.encode())
-            logger.info("Config sent to client")
-        except Exception as e:
-            logger.error(f"Error sending config: {e}")
-            handler.send_response(500)
-            handler.end_headers()
-
-    def handle_save_config(self, handler):
-        """Handle POST /api/config - Save new configuration"""
-        try:
-            content_length = int(handler.headers['Content-Length'])
-            post_data = handler.rfile.read(content_length)
-            new_config = json.loads(post_data.decode())
-
-            # Validate config structure
-            required_keys = ['apps', 'display', 'startup', 'exit', 'remote', 'advanced']
-            if not all(key in new_config for key in required_keys):
-                handler.send_response(400)
-                handler.end_headers()
-                handler.wfile.write(b'Invalid config structure')
-                return
-
-            # Save to config.json
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(new_config, f, indent=2)
-
-            # Update in-memory config
-            self.config = new_config
-
-            handler.send_response(200)
-            handler.send_header('Content-Type', 'application/json')
-            handler.send_header('Access-Control-Allow-Origin', '*')
-            handler.end_headers()
-            handler.wfile.write(b'{"status": "success"}')
-
-            logger.info("Config saved successfully")
-        except Exception as e:
-            logger.error(f"Error saving config: {e}")
-            handler.send_response(500)
-            handler.end_headers()
-            handler.wfile.write(f'{{"error": "{str(e)}"}}'.encode())
+        else:
+            self.launch_app(match['key'])
 
-    def find_chromium(self):
-        """Find chromium binary"""
+    def _resolve_chromium(self):
+        """Search PATH for a chromium binary"""
         for cmd in ['chromium-browser', 'chromium']:
-            path = shutil.which(cmd)
+            path = _which(cmd)
             if path:
                 return path
         return None
 
+    def find_chromium(self):
+        """Find chromium binary"""
+        return self._chromium_path
+
     def monitor_browser_output(self):
         """Monitor browser output in background thread"""
         if not self.browser_process:
@@ -329,24 +541,23 @@ class MediaHubLauncher:
             sys.exit(1)
 
         url = f'http://127.0.0.1:{self.port}/index.html'
-        flags = self.config['advanced']['chromium_flags']
-
-        cmd = [chromium] + flags + [url]
+        cmd = [chromium, *self._chromium_flags, url]
 
         logger.info(f"Launching browser: {' '.join(cmd)}")
 
         try:
-            # Set display
-            env = os.environ.copy()
-            if 'DISPLAY' not in env:
-                env['DISPLAY'] = ':0'
-
-            self.browser_process = subprocess.Popen(
-                cmd,
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+            # close_fds=False lets CPython take the posix_spawn fast path;
+            # our own descriptors are non-inheritable so nothing leaks.
+            # stdout is never read, so don't let it fill a pipe; stderr is
+            # drained by monitor_browser_output()
+            with self.process_lock:
+                self.browser_process = subprocess.Popen(
+                    cmd,
+                    env=self._child_env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    close_fds=False
+                )
             logger.info(f"Browser process started (PID: {self.browser_process.pid})")
 
             # Start monitoring output
@@ -358,13 +569,10 @@ class MediaHubLauncher:
             if poll_result is not None:
                 # Process has already exited
                 stderr_output = self.browser_process.stderr.read().decode('utf-8', errors='replace') if self.browser_process.stderr else ''
-                stdout_output = self.browser_process.stdout.read().decode('utf-8', errors='replace') if self.browser_process.stdout else ''
 
                 logger.error(f"Browser process exited immediately with code {poll_result}")
                 if stderr_output:
                     logger.error(f"Browser stderr:\n{stderr_output}")
-                if stdout_output:
-                    logger.info(f"Browser stdout:\n{stdout_output}")
 
                 sys.exit(1)
 
@@ -376,128 +584,133 @@ class MediaHubLauncher:
         """Launch specific app based on configuration"""
         logger.info(f"Launching app: {app_key}")
 
-        if app_key not in self.config['apps']:
+        plan = self._plans.get(app_key)
+        if plan is None:
             logger.error(f"Unknown app: {app_key}")
             return
 
-        app = self.config['apps'][app_key]
-        if not app.get('enabled', False):
+        if not plan.enabled:
             logger.warning(f"App {app_key} is disabled")
             return
 
-        # Close current browser
-        if self.browser_process:
-            self.browser_process.terminate()
-            time.sleep(0.5)
+        if not self._launch_lock.acquire(blocking=False):
+            logger.warning(f"Ignoring launch of {app_key}: another launch is in progress")
+            return
+        try:
+            self._launch_app(app_key, plan)
+        finally:
+            self._launch_lock.release()
 
-        # Launch based on method
-        method = app.get('launch_method', 'browser')
+    def _launch_app(self, app_key, plan):
+        """Replace the hub with the app; caller holds _launch_lock"""
+        with self.process_lock:
+            if self.app_process and self.app_process.poll() is None:
+                logger.warning(f"Ignoring launch of {app_key}: an app is already running")
+                return
 
-        if method == 'auto':
-            # Try native first, fallback to browser
-            if app.get('prefer_native', False):
-                if self.launch_native_app(app_key, app):
-                    return
-            self.launch_browser_app(app)
-        elif method == 'native':
-            self.launch_native_app(app_key, app)
-        else:
-            self.launch_browser_app(app)
+        # Close current browser
+        with self.process_lock:
+            browser_process = self.browser_process
+            if browser_process:
+                browser_process.terminate()
+                self.browser_process = None
+        if browser_process:
+            # Wait only as long as chromium actually takes to exit
+            try:
+                browser_process.wait(timeout=2.0)
+            except subprocess.TimeoutExpired:
+                browser_process.kill()
+                browser_process.wait()
 
-    def launch_native_app(self, app_key, app):
-        """Launch native application if available"""
-        native_apps = {
-            'jellyfin': ['jellyfinmediaplayer', 'jellyfin-media-player'],
-            'spotify': ['spotify'],
-        }
+        # Native first when the plan has one, otherwise (or on failure) browser
+        if plan.native_cmd and self.launch_native_app(app_key, plan):
+            return
+        if plan.method == 'native':
+            logger.info(f"No native app found for {app_key}")
+        elif self.launch_browser_app(app_key, plan):
+            return
 
-        if app_key not in native_apps:
-            logger.info(f"No native app defined for {app_key}")
-            return False
+        # Nothing was started, so SIGCHLD won't bring the hub back. Do it on
+        # the main loop, where a failed relaunch exits non-zero for systemd
+        self.call_on_main(self.resume_hub)
 
-        for cmd in native_apps[app_key]:
-            if shutil.which(cmd):
-                logger.info(f"Launching native app: {cmd}")
-                try:
-                    env = os.environ.copy()
-                    if 'DISPLAY' not in env:
-                        env['DISPLAY'] = ':0'
-
-                    # Special handling for Jellyfin Media Player
-                    if app_key == 'jellyfin':
-                        launch_cmd = [cmd, '--fullscreen', f'--platform', 'eglfs']
-                    else:
-                        launch_cmd = [cmd]
-
-                    self.app_process = subprocess.Popen(
-                        launch_cmd,
-                        env=env,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL
-                    )
-
-                    # Wait for app to close, then restart hub
-                    self.app_process.wait()
-                    logger.info(f"Native app {cmd} closed, restarting hub")
-                    self.restart_hub()
-                    return True
-                except Exception as e:
-                    logger.error(f"Failed to launch {cmd}: {e}")
+    def launch_native_app(self, app_key, plan):
+        """Launch native application"""
+        launch_cmd = plan.native_cmd
+        cmd = os.path.basename(launch_cmd[0])
+        logger.info(f"Launching native app: {cmd}")
+        try:
+            # Replace the launcher with the app to free its memory;
+            # the hub only comes back if systemd restarts us
+            if plan.exec_replace:
+                # Check before tearing down; there's no way back after cleanup()
+                if not os.access(launch_cmd[0], os.X_OK):
+                    logger.error(f"Cannot exec {launch_cmd[0]}: not executable")
                     return False
 
-        logger.info(f"No native app found for {app_key}")
-        return False
+                logger.info(f"Replacing launcher with {cmd}")
+                self.cleanup()
+                log_listener.stop()
+                try:
+                    os.execve(launch_cmd[0], launch_cmd, self._child_env)
+                except OSError as e:
+                    # Everything is shut down already; exit non-zero so
+                    # systemd's Restart=on-failure brings the hub back
+                    log_listener.start()
+                    logger.error(f"Failed to exec {cmd}: {e}")
+                    log_listener.stop()
+                    os._exit(1)
+
+            with self.process_lock:
+                self.app_process = subprocess.Popen(
+                    launch_cmd,
+                    env=self._child_env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    close_fds=False
+                )
+
+            # The SIGCHLD handler restarts the hub when the app closes
+            return True
+        except Exception as e:
+            logger.error(f"Failed to launch {cmd}: {e}")
+            return False
 
-    def launch_browser_app(self, app):
+    def launch_browser_app(self, app_key, plan):
         """Launch app in browser"""
-        chromium = self.find_chromium()
-        if not chromium:
-            logger.error("Chromium not found!")
-            return
-
-        url = app['url']
-        flags = self.config['advanced']['chromium_flags'].copy()
-
-        # Special flags for different apps
-        if 'youtube' in url:
-            flags.append('--user-agent=Mozilla/5.0 (SMART-TV; Linux; Tizen 5.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/94.0.4606.31 TV Safari/537.36')
-
-        cmd = [chromium] + flags + [url]
+        if not plan.browser_cmd:
+            logger.error(f"Cannot launch {app_key} in browser: chromium or URL missing")
+            return False
 
-        logger.info(f"Launching browser app: {url}")
+        logger.info(f"Launching browser app: {plan.url}")
 
         try:
-            env = os.environ.copy()
-            if 'DISPLAY' not in env:
-                env['DISPLAY'] = ':0'
-
-            self.app_process = subprocess.Popen(
-                cmd,
-                env=env,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-
-            # Monitor process
-            self.app_process.wait()
-            logger.info("Browser app closed, restarting hub")
-            self.restart_hub()
+            with self.process_lock:
+                self.app_process = subprocess.Popen(
+                    plan.browser_cmd,
+                    env=self._child_env,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    close_fds=False
+                )
+            return True
         except Exception as e:
             logger.error(f"Failed to launch browser app: {e}")
+            return False
 
     def restart_hub(self):
         """Restart the main hub interface"""
         logger.info("Restarting hub interface")
-        time.sleep(1)
+        self.wait_for_server_ready(timeout=0.5)
         self.launch_browser()
 
     def cec_command(self, command):
         """Send CEC command to TV"""
-        if not self.config['remote']['enable_cec']:
+        if not self._cec_enabled:
             logger.info("CEC is disabled")
             return False
 
-        if not shutil.which('cec-client'):
+        if not self._cec_available:
             logger.warning("cec-client not found")
             return False
 
@@ -513,25 +726,43 @@ class MediaHubLauncher:
 
         try:
             logger.info(f"Sending CEC command: {command}")
-            cmd = f'echo "{cec_commands[command]}" | cec-client -s -d 1'
-            subprocess.run(cmd, shell=True, timeout=5, capture_output=True)
+            with self._cec_lock:
+                cec_proc = self._get_cec_process()
+                cec_proc.stdin.write((cec_commands[command] + '\n').encode())
+                cec_proc.stdin.flush()
             return True
         except Exception as e:
             logger.error(f"CEC command failed: {e}")
             return False
 
+    def _get_cec_process(self):
+        """Return the running cec-client, (re)starting it if needed"""
+        if self._cec_proc is None or self._cec_proc.poll() is not None:
+            if self._cec_proc is not None:
+                logger.warning("cec-client exited, restarting it")
+            # Bus setup happens once here; later commands are just a pipe write
+            self._cec_proc = subprocess.Popen(
+                [self._cec_path, '-d', '1'],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+                close_fds=False
+            )
+        return self._cec_proc
+
     def handle_exit(self):
         """Handle exit request"""
         logger.info("Exit requested")
 
-        action = self.config['exit']['action']
+        action = self._exit_action
 
         if action == 'cec_standby':
             if self.cec_command('standby'):
                 logger.info("TV standby command sent")
             else:
                 logger.warning("CEC standby failed, using fallback")
-                action = self.config['exit'].get('cec_fallback', 'close')
+                action = self._exit_fallback
 
         if action == 'shutdown':
             logger.info("Shutting down system")
@@ -547,17 +778,77 @@ class MediaHubLauncher:
     def cleanup(self):
         """Clean up resources"""
         logger.info("Cleaning up...")
+        self._running = False
 
-        if self.browser_process:
-            self.browser_process.terminate()
-            self.browser_process.wait()
-
-        if self.app_process:
-            self.app_process.terminate()
-            self.app_process.wait()
+        # Let cec-client finish what it was sent (e.g. standby on exit) and quit
+        with self._cec_lock:
+            if self._cec_proc and self._cec_proc.poll() is None:
+                try:
+                    self._cec_proc.stdin.write(b'q\n')
+                    self._cec_proc.stdin.close()
+                    self._cec_proc.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired) as e:
+                    logger.warning(f"cec-client did not quit cleanly: {e}")
+
+        # Signal everything first so the shutdowns overlap, then reap
+        procs = [p for p in (self.browser_process, self.app_process, self._cec_proc)
+                 if p and p.poll() is None]
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            try:
+                p.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
 
         if self.http_server:
             self.http_server.shutdown()
+            self.http_server.server_close()
+
+    def call_on_main(self, func):
+        """Run func on the main loop"""
+        self._events.put(func)
+        if self._wakeup_write is not None:
+            try:
+                os.write(self._wakeup_write, b'\0')
+            except BlockingIOError:
+                # Pipe is full, so the main loop has a wakeup pending anyway
+                pass
+
+    def resume_hub(self):
+        """Bring the hub back after a launch that started nothing"""
+        with self._launch_lock:
+            with self.process_lock:
+                if self.browser_process or (self.app_process and self.app_process.poll() is None):
+                    return
+            self.restart_hub()
+
+    def sigchld_handler(self, signum, frame):
+        """Hand child exits to the main loop"""
+        self._events.put(self.reap_children)
+
+    def reap_children(self):
+        """Restart the hub when an app closes, stop when the hub browser does"""
+        if not self._running:
+            return
+
+        with self.process_lock:
+            app_process = self.app_process
+            browser_process = self.browser_process
+
+        if app_process and app_process.poll() is not None:
+            # Don't race a launch request that is replacing the hub right now
+            with self._launch_lock:
+                with self.process_lock:
+                    if self.app_process is not app_process:
+                        return
+                    self.app_process = None
+                logger.info("App closed, restarting hub")
+                self.restart_hub()
+        elif browser_process and browser_process.poll() is not None and not app_process:
+            logger.info("Browser closed, stopping")
+            self._running = False
 
     def signal_handler(self, signum, frame):
         """Handle interrupt signals"""
@@ -572,9 +863,22 @@ class MediaHubLauncher:
         # Check dependencies
         self.check_dependencies()
 
+        # Start cec-client now so the first remote command doesn't pay its startup
+        if self._cec_enabled and self._cec_available:
+            with self._cec_lock:
+                self._get_cec_process()
+
         # Setup signal handlers
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
+        signal.signal(signal.SIGCHLD, self.sigchld_handler)
+
+        # Signals may land on any thread, so have them wake us through a pipe;
+        # call_on_main() uses the same pipe
+        wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        signal.set_wakeup_fd(self._wakeup_write)
 
         # Start HTTP server
         self.start_http_server()
@@ -586,11 +890,15 @@ class MediaHubLauncher:
 
         # Launch browser
         self.launch_browser()
+        self._running = True
 
-        # Wait for browser process
+        # Process child exits until the hub browser goes away
         try:
-            if self.browser_process:
-                self.browser_process.wait()
+            while self._running:
+                select.select([wakeup_read], [], [])
+                os.read(wakeup_read, 512)
+                while not self._events.empty():
+                    self._events.get()()
         except KeyboardInterrupt:
             pass
         finally: